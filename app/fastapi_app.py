@@ -1,11 +1,13 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from pydantic import BaseModel
 from src.agent import RAGAgent
+from starlette.concurrency import run_in_threadpool
+import shutil
 import uvicorn
 import os
 
@@ -35,6 +37,16 @@ class Query(BaseModel):
 class Response(BaseModel):
     response: str
 
+class BatchQuery(BaseModel):
+    queries: list[str]
+
+class BatchResponse(BaseModel):
+    responses: list[str]
+
+MAX_BATCH_QUERIES = 32
+SMALL_UPLOAD_BYTES = 64 * 1024  # Below this, one sync write beats async scheduling
+UPLOAD_CHUNK_BYTES = 1 << 20  # Streaming chunk size for large uploads
+
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -86,6 +98,59 @@ async def process_query(query: Query):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/stream")
+async def stream_query(query: Query):
+    """
+    Stream the agent's answer token by token as it is generated.
+
+    Args:
+        query (Query): The query text
+
+    Returns:
+        StreamingResponse: Plain-text answer tokens
+    """
+    stream = agent.stream_response(query.text)
+    try:
+        # Pull the first token before committing to a 200 so retrieval and
+        # prompt failures surface as proper HTTP errors
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def generate():
+        yield first
+        async for chunk in stream:
+            yield chunk
+
+    return StreamingResponse(generate(), media_type="text/plain")
+
+@app.post("/batch_query", response_model=BatchResponse)
+async def process_batch_query(batch: BatchQuery):
+    """
+    Process several queries in one request.
+
+    Embeds all queries in a single forward pass, retrieves their contexts
+    with one FAISS search, and runs the LLM calls concurrently.
+
+    Args:
+        batch (BatchQuery): The list of query texts (max 32)
+
+    Returns:
+        BatchResponse: One response per query, in order
+    """
+    if len(batch.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size is limited to {MAX_BATCH_QUERIES} queries"
+        )
+    try:
+        responses = await agent.get_responses(batch.queries)
+        return {"responses": responses}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
@@ -98,14 +163,24 @@ async def upload_file(file: UploadFile = File(...)):
         dict: Upload status message
     """
     try:
-        content = await file.read()
         file_path = f"data/documents/{file.filename}"
-        
+
         # Ensure directory exists
         os.makedirs("data/documents", exist_ok=True)
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
+
+        # Small files: one sync write is cheaper than async scheduling.
+        # Large files: pipe the spooled upload straight to disk in 1MB
+        # chunks off the event loop, never holding the body in Python.
+        head = await file.read(SMALL_UPLOAD_BYTES + 1)
+        if len(head) <= SMALL_UPLOAD_BYTES:
+            with open(file_path, "wb") as f:
+                f.write(head)
+        else:
+            await file.seek(0)
+            with open(file_path, "wb") as f:
+                await run_in_threadpool(
+                    shutil.copyfileobj, file.file, f, UPLOAD_CHUNK_BYTES
+                )
 
         if file.filename.endswith('.pdf'):
             loader = PyPDFLoader(file_path)
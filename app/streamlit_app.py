@@ -10,6 +10,7 @@ from src.agent import RAGAgent
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 import asyncio
 import os
+import shutil
 from src.storage_manager import StorageManager
 from src.document_processor import DocumentProcessor
 
@@ -50,12 +51,13 @@ with st.sidebar:
     if uploaded_file:
         with st.spinner("Processing document..."):
             try:
-                bytes_data = uploaded_file.read()
                 file_path = f"data/documents/{uploaded_file.name}"
                 os.makedirs("data/documents", exist_ok=True)
-                
+
+                # Stream to disk in 1MB chunks instead of buffering the
+                # whole upload in memory
                 with open(file_path, "wb") as f:
-                    f.write(bytes_data)
+                    shutil.copyfileobj(uploaded_file, f, length=1 << 20)
                 
                 if uploaded_file.name.endswith('.pdf'):
                     loader = PyPDFLoader(file_path)
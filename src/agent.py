@@ -1,16 +1,20 @@
 from langchain_groq import ChatGroq
 from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain_core.prompts import PromptTemplate
+from langchain.memory import ConversationTokenBufferMemory
+from langchain_core.messages import get_buffer_string
+from langchain_core.prompts import ChatPromptTemplate
 from .vector_store import VectorStore
 from .web_search import KenyanWebSearch
+from .cache import Cache
 from .config import Config
 import asyncio
+import hashlib
 
 class RAGAgent:
     def __init__(self):
         self.vector_store = VectorStore()
         self.web_search = KenyanWebSearch()
+        self.cache = Cache()
         
         # Initialize LLM
         self.llm = ChatGroq(
@@ -20,29 +24,30 @@ class RAGAgent:
             max_tokens=Config.MAX_TOKENS
         )
         
-        # Initialize memory
-        self.memory = ConversationBufferMemory(
+        # Initialize memory with a hard token cap so history carried per
+        # turn stays bounded over long sessions
+        self.memory = ConversationTokenBufferMemory(
+            llm=self.llm,
+            max_token_limit=Config.MEMORY_TOKEN_LIMIT,
             memory_key="chat_history",
             return_messages=True,
             output_key="answer"
         )
-        
-        # Create custom prompt template
-        self.qa_prompt = PromptTemplate(
-            template="""You are a helpful AI assistant focused on providing information about Kenya. 
-            Use the following pieces of context to answer the question at the end. 
-            If you don't know the answer, say that you don't know and suggest searching for more information.
-            Try to be specific and cite sources when possible.
-
-            Context: {context}
-
-            Chat History: {chat_history}
-            
-            Question: {question}
 
-            Answer:""",
-            input_variables=["context", "chat_history", "question"]
-        )
+        # Create custom prompt template, composed once at startup.
+        # chat_history stays a plain string variable because
+        # ConversationalRetrievalChain stringifies history before handing it
+        # to the combine-docs chain
+        self.qa_prompt = ChatPromptTemplate.from_messages([
+            ("system",
+             "You are a helpful AI assistant focused on providing information about Kenya. "
+             "Use the following pieces of context to answer the question at the end. "
+             "If you don't know the answer, say that you don't know and suggest searching for more information. "
+             "Try to be specific and cite sources when possible.\n\n"
+             "Context: {context}\n\n"
+             "Chat History: {chat_history}"),
+            ("human", "{question}")
+        ])
         
         # Initialize the chain
         self.chain = ConversationalRetrievalChain.from_llm(
@@ -67,6 +72,15 @@ class RAGAgent:
             str: The agent's response
         """
         try:
+            # Return cached answer for repeated questions in the same
+            # conversation state, skipping the full chain round trip
+            cache_key = hashlib.sha256(
+                (query + str(self.memory.buffer)).encode()
+            ).hexdigest()
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
             # Try vector store first
             docs = self.vector_store.similarity_search(query)
             
@@ -78,11 +92,10 @@ class RAGAgent:
                     context = "\n".join([f"{r['title']}: {r['snippet']}" for r in web_results])
                     query = f"Context from web search: {context}\nQuestion: {query}"
             
-            # Run the chain
-            response = await asyncio.to_thread(
-                self.chain,
-                {"question": query}
-            )
+            # Run the chain on the event loop; ainvoke shares the loop across
+            # concurrent queries instead of pinning a threadpool slot for the
+            # multi-second LLM round trip
+            response = await self.chain.ainvoke({"question": query})
             
             # Extract answer and sources
             answer = response.get("answer", "I couldn't find an answer to your question.")
@@ -93,12 +106,79 @@ class RAGAgent:
                 source_texts = [f"Source {i+1}: {doc.metadata.get('source', 'Unknown source')}"
                               for i, doc in enumerate(sources)]
                 answer = f"{answer}\n\nSources:\n" + "\n".join(source_texts)
-            
+
+            self.cache.set(cache_key, answer, ttl=3600)
             return answer
             
         except Exception as e:
             return f"An error occurred: {str(e)}"
 
+    async def stream_response(self, query: str):
+        """
+        Stream the answer for the given query as the LLM generates it.
+
+        Streams tokens straight from ChatGroq over pre-retrieved context;
+        ConversationalRetrievalChain itself cannot token-stream. Retrieval
+        and prompt setup run before the first token, so failures raise to
+        the caller instead of leaking into the response body.
+
+        Args:
+            query (str): The user's question
+
+        Yields:
+            str: Answer tokens as the model produces them
+        """
+        docs = self.vector_store.similarity_search(query)
+        context = "\n\n".join(doc.page_content for doc in docs)
+        history = self.memory.load_memory_variables({}).get("chat_history", "")
+        if isinstance(history, list):
+            history = get_buffer_string(history)
+        messages = self.qa_prompt.format_messages(
+            context=context,
+            chat_history=history,
+            question=query
+        )
+
+        parts = []
+        async for chunk in self.llm.astream(messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        self.memory.save_context(
+            {"question": query},
+            {"answer": "".join(parts)}
+        )
+
+    async def get_responses(self, queries):
+        """
+        Answer several queries concurrently, sharing one batched retrieval.
+
+        Args:
+            queries: List of user questions
+
+        Returns:
+            list: One answer per query, in order
+        """
+        docs_per_query = self.vector_store.batch_similarity_search(queries)
+        return await asyncio.gather(*[
+            self._answer_with_docs(query, docs)
+            for query, docs in zip(queries, docs_per_query)
+        ])
+
+    async def _answer_with_docs(self, query: str, docs) -> str:
+        """Answer a single query against pre-retrieved documents."""
+        try:
+            context = "\n\n".join(doc.page_content for doc in docs)
+            messages = self.qa_prompt.format_messages(
+                context=context,
+                chat_history="",
+                question=query
+            )
+            response = await self.llm.ainvoke(messages)
+            return response.content
+        except Exception as e:
+            return f"An error occurred: {str(e)}"
+
     def add_documents(self, documents):
         """
         Add documents to the vector store.
@@ -1,4 +1,3 @@
-from functools import lru_cache
 import diskcache
 import time
 from typing import Any, Optional
@@ -20,7 +19,6 @@ class Cache:
         """Delete key from cache."""
         self.cache.delete(key)
 
-    @lru_cache(maxsize=100)
     def memoize(self, func):
         """Decorator for function-level caching."""
         def wrapper(*args, **kwargs):
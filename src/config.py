@@ -12,12 +12,21 @@ class Config:
     MODEL_NAME = "llama-3.3-70b-versatile"  # Updated to Llama 3.3 70B Versatile
     TEMPERATURE = 0.7
     MAX_TOKENS = 1000
+    MEMORY_TOKEN_LIMIT = 2000  # Hard cap on chat history carried per turn
     
     # Embedding Configuration
     EMBEDDING_MODEL = "BAAI/bge-large-en-v1.5"
+    EMBEDDING_BATCH_SIZE = 64  # Texts per model forward pass
+    EMBEDDING_CHUNK_GROUP = 256  # Texts embedded per add_documents round to bound memory
+    USE_ONNX_EMBEDDINGS = os.getenv("USE_ONNX_EMBEDDINGS", "true").lower() == "true"
     
     # Vector Store Configuration
     VECTOR_DB_PATH = "data/vector_store"
+    SEARCH_K = 4  # Neighbours returned per query
+    HNSW_M = 32  # Graph connectivity of the HNSW index
+    HNSW_EF_CONSTRUCTION = 200  # Build-time candidate list size
+    HNSW_EF_SEARCH = 64  # Query-time candidate list size
+    BACKUP_EVERY_N_CHUNKS = 50  # Snapshot the store after this many new chunks
     
     # Web Search Configuration
     MAX_SEARCH_RESULTS = 5
@@ -37,11 +37,20 @@ class StorageManager:
     def list_documents(self, file_type: Optional[str] = None) -> List[Path]:
         """List all documents or documents of specific type."""
         if file_type:
-            return list((self.documents_dir / file_type).glob("*"))
-        
-        pdf_files = list((self.documents_dir / "pdf").glob("*"))
-        txt_files = list((self.documents_dir / "txt").glob("*"))
-        return pdf_files + txt_files
+            dirs = [self.documents_dir / file_type]
+        else:
+            dirs = [self.documents_dir / "pdf", self.documents_dir / "txt"]
+
+        # os.scandir returns cached DirEntry objects, avoiding the per-entry
+        # stat calls glob pays for. Missing directories yield nothing, as
+        # glob did, rather than raising
+        return [
+            Path(entry.path)
+            for directory in dirs
+            if directory.is_dir()
+            for entry in os.scandir(directory)
+            if entry.is_file()
+        ]
 
     def delete_document(self, filename: str) -> bool:
         """Delete a document."""
@@ -1,12 +1,17 @@
+import faiss
+import torch
 from langchain_community.vectorstores import FAISS
 from langchain.schema import Document
 from typing import List, Optional, Dict, Any
 import numpy as np
+import glob
+import hashlib
 import pickle
 import os
 import shutil
 from datetime import datetime
-from .embeddings import get_embeddings
+from .embeddings import get_embeddings, BGE_QUERY_INSTRUCTION
+from .fastmath import l2norm
 from .document_processor import DocumentProcessor
 from .cache import Cache
 from .config import Config
@@ -18,12 +23,21 @@ class VectorStore:
         self.persist_dir = persist_dir
         self.index_file = os.path.join(persist_dir, "faiss_index")
         self.store_file = os.path.join(persist_dir, "store.pkl")
+        self.hashes_file = os.path.join(persist_dir, "chunk_hashes.pkl")
         self.embeddings = get_embeddings()
         self.doc_processor = DocumentProcessor()
         self.cache = Cache()
         self.storage = StorageManager()
+        self._on_gpu = False
+        self._mmap_loaded = False
+        self._pending_since_snapshot = 0
         self.vector_store = self._load_or_create_store()
-        
+        self.seen_hashes = self._load_seen_hashes()
+        self._persisted_ids = set(
+            getattr(self.vector_store.docstore, "_dict", {})
+        )
+        self._maybe_move_to_gpu()
+
         # Create backup directory
         self.backup_dir = os.path.join(persist_dir, "backups")
         os.makedirs(self.backup_dir, exist_ok=True)
@@ -32,11 +46,50 @@ class VectorStore:
         """Create a new FAISS vector store with a dummy document."""
         # Create a dummy document to initialize the store
         dummy_text = ["initialization document"]
-        return FAISS.from_texts(
+        store = FAISS.from_texts(
             dummy_text,
             self.embeddings,
             metadatas=[{"source": "initialization"}]
         )
+        self._ensure_hnsw(store)
+        return store
+
+    @staticmethod
+    def _gpu_available() -> bool:
+        """Check for CUDA plus a faiss build with GPU support."""
+        return torch.cuda.is_available() and hasattr(faiss, "StandardGpuResources")
+
+    def _maybe_move_to_gpu(self) -> None:
+        """Clone the index to GPU so searches run as GPU BLAS."""
+        if not self._gpu_available():
+            return
+        try:
+            self._gpu_resources = faiss.StandardGpuResources()
+            self.vector_store.index = faiss.index_cpu_to_gpu(
+                self._gpu_resources, 0, self.vector_store.index
+            )
+            self._on_gpu = True
+            self._mmap_loaded = False  # The GPU copy is writable
+        except Exception as e:
+            print(f"Could not move FAISS index to GPU: {e}")
+
+    def _ensure_hnsw(self, store: FAISS) -> None:
+        """Swap a flat index for HNSW so queries are sub-linear in corpus size."""
+        if self._gpu_available():
+            # HNSW has no GPU implementation; brute-force flat search on GPU
+            # is faster than CPU HNSW at this corpus scale
+            return
+        if hasattr(store.index, "hnsw"):
+            store.index.hnsw.efSearch = Config.HNSW_EF_SEARCH
+            return
+
+        d = store.index.d
+        new_index = faiss.IndexHNSWFlat(d, Config.HNSW_M)
+        new_index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+        new_index.hnsw.efSearch = Config.HNSW_EF_SEARCH
+        if store.index.ntotal > 0:
+            new_index.add(store.index.reconstruct_n(0, store.index.ntotal))
+        store.index = new_index
 
     def _load_or_create_store(self) -> FAISS:
         """Load existing vector store or create a new one."""
@@ -44,15 +97,125 @@ class VectorStore:
         
         if os.path.exists(self.index_file) and os.path.exists(self.store_file):
             try:
-                return FAISS.load_local(self.persist_dir, self.embeddings)
+                store = self._load_store_mmap()
             except Exception as e:
-                print(f"Error loading existing store: {e}")
-                return self._create_new_store()
+                print(f"Error memory-mapping store, reading fully: {e}")
+                try:
+                    # Same files and shard overlay, just without mmap
+                    self._mmap_loaded = False
+                    store = self._read_store()
+                except Exception as e:
+                    print(f"Error loading existing store: {e}")
+                    return self._create_new_store()
+            self._ensure_hnsw(store)  # Migrate legacy flat indexes
+            return store
         return self._create_new_store()
 
+    def _load_store_mmap(self) -> FAISS:
+        """Memory-map the index instead of reading it fully into RAM.
+
+        Cold start becomes O(1) in index size; the OS pages vectors in on
+        demand. The mapped index is read-only, so add_documents swaps in a
+        writable clone before the first insert.
+        """
+        store = self._read_store(faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        self._mmap_loaded = True
+        return store
+
+    def _read_store(self, io_flags: int = 0) -> FAISS:
+        """Read the persisted index and docstore, overlaying incremental shards."""
+        index = faiss.read_index(self.index_file, io_flags)
+        with open(self.store_file, "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+        # Overlay incremental shards written since the last compaction
+        for shard_file in self._list_shards():
+            with open(shard_file, "rb") as f:
+                shard = pickle.load(f)
+            docstore._dict.update(shard['docstore'])
+            index_to_docstore_id.update(shard['i2d'])
+
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
+        )
+
+    def _load_seen_hashes(self) -> set:
+        """Load the persisted chunk-hash set, rebuilding it from the docstore if missing."""
+        if os.path.exists(self.hashes_file):
+            try:
+                with open(self.hashes_file, "rb") as f:
+                    return pickle.load(f)
+            except Exception as e:
+                print(f"Error loading chunk hashes: {e}")
+
+        docs = getattr(self.vector_store.docstore, "_dict", {})
+        return {
+            doc.metadata["chunk_hash"]
+            for doc in docs.values()
+            if "chunk_hash" in doc.metadata
+        }
+
+    def _list_shards(self) -> List[str]:
+        """List incremental docstore shard files in write order."""
+        return sorted(glob.glob(os.path.join(self.persist_dir, "store.[0-9]*.pkl")))
+
+    def _write_base_pickle(self) -> None:
+        """Write the full docstore pickle and drop the incremental shards."""
+        tmp = self.store_file + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(
+                (self.vector_store.docstore, self.vector_store.index_to_docstore_id),
+                f
+            )
+        os.replace(tmp, self.store_file)
+        for shard_file in self._list_shards():
+            os.remove(shard_file)
+        self._persisted_ids = set(getattr(self.vector_store.docstore, "_dict", {}))
+
     def _save_store(self) -> None:
-        """Save the vector store to disk."""
-        self.vector_store.save_local(self.persist_dir)
+        """Save the vector store to disk, re-pickling only new docstore entries."""
+        index = self.vector_store.index
+        if self._on_gpu:
+            # write_index only handles CPU indexes; persist a CPU clone and
+            # keep serving from the GPU copy
+            index = faiss.index_gpu_to_cpu(index)
+
+        # tmp + rename so a crash never leaves a torn index file
+        tmp_index = self.index_file + ".tmp"
+        faiss.write_index(index, tmp_index)
+        os.replace(tmp_index, self.index_file)
+
+        if not os.path.exists(self.store_file):
+            self._write_base_pickle()
+        else:
+            docs = getattr(self.vector_store.docstore, "_dict", {})
+            new_ids = set(docs) - self._persisted_ids
+            if new_ids:
+                shard = {
+                    'docstore': {doc_id: docs[doc_id] for doc_id in new_ids},
+                    'i2d': {
+                        pos: doc_id
+                        for pos, doc_id in self.vector_store.index_to_docstore_id.items()
+                        if doc_id in new_ids
+                    }
+                }
+                shard_file = os.path.join(
+                    self.persist_dir,
+                    f"store.{len(self._list_shards()):04d}.pkl"
+                )
+                with open(shard_file, "wb") as f:
+                    pickle.dump(shard, f)
+                self._persisted_ids |= new_ids
+
+        # tmp + rename rather than truncating in place, so hardlinked
+        # backup snapshots of the hash set are never clobbered
+        tmp_hashes = self.hashes_file + ".tmp"
+        with open(tmp_hashes, "wb") as f:
+            pickle.dump(self.seen_hashes, f)
+        os.replace(tmp_hashes, self.hashes_file)
 
     def create_backup(self) -> str:
         """Create a backup of the current vector store."""
@@ -62,11 +225,24 @@ class VectorStore:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = os.path.join(self.backup_dir, f"backup_{timestamp}")
         os.makedirs(backup_path, exist_ok=True)
-        
-        # Copy the index and store files
-        shutil.copy2(self.index_file, backup_path)
-        shutil.copy2(self.store_file, backup_path)
-        
+
+        # Fold outstanding shards into the base pickle so the snapshot is
+        # self-contained
+        self._write_base_pickle()
+
+        # Hardlink instead of copying: instant snapshot on the same
+        # filesystem, and saves replace files rather than rewriting them in
+        # place so the linked snapshot stays intact
+        for src in (self.index_file, self.store_file, self.hashes_file):
+            if not os.path.exists(src):
+                continue
+            dst = os.path.join(backup_path, os.path.basename(src))
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+        self._pending_since_snapshot = 0
         return f"Backup created at {backup_path}"
 
     def restore_backup(self, backup_timestamp: str) -> str:
@@ -75,12 +251,39 @@ class VectorStore:
         if not os.path.exists(backup_path):
             return f"Backup {backup_timestamp} not found"
             
-        # Replace current store with backup
-        shutil.copy2(os.path.join(backup_path, "faiss_index"), self.index_file)
-        shutil.copy2(os.path.join(backup_path, "store.pkl"), self.store_file)
-        
-        # Reload the store
+        # Drop shards written after the snapshot; they reference vectors the
+        # restored index no longer has
+        for shard_file in self._list_shards():
+            os.remove(shard_file)
+
+        # Replace current store with backup. Copy to a tmp file and rename,
+        # as _save_store does: the live files may share inodes with the
+        # hardlinked backups, and writing through them directly would either
+        # raise SameFileError or corrupt the newest snapshot
+        def _restore_file(src: str, dst: str) -> None:
+            tmp = dst + ".tmp"
+            shutil.copy2(src, tmp)
+            os.replace(tmp, dst)
+
+        _restore_file(os.path.join(backup_path, "faiss_index"), self.index_file)
+        _restore_file(os.path.join(backup_path, "store.pkl"), self.store_file)
+        backup_hashes = os.path.join(backup_path, os.path.basename(self.hashes_file))
+        if os.path.exists(backup_hashes):
+            _restore_file(backup_hashes, self.hashes_file)
+        elif os.path.exists(self.hashes_file):
+            # No snapshot of the hash set; drop the stale one so it is
+            # rebuilt from the restored docstore
+            os.remove(self.hashes_file)
+
+        # Reload the store; the fresh index starts on CPU, so reset the GPU
+        # flag before re-cloning
+        self._on_gpu = False
         self.vector_store = self._load_or_create_store()
+        self.seen_hashes = self._load_seen_hashes()
+        self._persisted_ids = set(
+            getattr(self.vector_store.docstore, "_dict", {})
+        )
+        self._maybe_move_to_gpu()
         return f"Restored from backup {backup_timestamp}"
 
     def add_documents(self, documents: List[Document]) -> None:
@@ -93,20 +296,54 @@ class VectorStore:
             texts = [chunk.page_content for chunk in chunks]
             metadatas = [chunk.metadata for chunk in chunks]
             
-            # Create backup before adding new documents
-            self.create_backup()
-            
-            # Add to vector store
-            if not texts:  # Skip if no texts to add
+            # Drop chunks whose content hash is already in the store, so
+            # re-uploading a document never re-embeds it. seen_hashes is only
+            # updated once a group is actually added, so a failed embed does
+            # not poison later retries
+            fresh = []
+            batch_hashes = set()
+            for text, metadata in zip(texts, metadatas):
+                chunk_hash = metadata.get('chunk_hash')
+                if chunk_hash in self.seen_hashes or chunk_hash in batch_hashes:
+                    continue
+                batch_hashes.add(chunk_hash)
+                fresh.append((text, metadata))
+            if not fresh:
                 return
-                
-            self.vector_store.add_texts(
-                texts=texts,
-                metadatas=metadatas
-            )
+            texts, metadatas = map(list, zip(*fresh))
+
+            # A memory-mapped index is read-only; clone it into RAM before
+            # the first insert
+            if self._mmap_loaded:
+                self.vector_store.index = faiss.clone_index(self.vector_store.index)
+                self._mmap_loaded = False
+
+            # Snapshot periodically rather than on every add; save_local below
+            # already keeps the live store durable
+            self._pending_since_snapshot += len(texts)
+            if self._pending_since_snapshot >= Config.BACKUP_EVERY_N_CHUNKS:
+                self.create_backup()
+
+            # Pre-embed in bounded groups so each group is a single batched
+            # forward pass instead of add_texts' internal per-8 loop
+            group = Config.EMBEDDING_CHUNK_GROUP
+            for start in range(0, len(texts), group):
+                batch_texts = texts[start:start + group]
+                batch_metas = metadatas[start:start + group]
+                vectors = l2norm(np.asarray(
+                    self.embeddings.embed_documents(batch_texts),
+                    dtype=np.float32
+                ))
+                self.vector_store.add_embeddings(
+                    list(zip(batch_texts, vectors)),
+                    metadatas=batch_metas
+                )
+                self.seen_hashes.update(
+                    meta['chunk_hash'] for meta in batch_metas
+                )
             
             # Save to disk
-            self.vector_store.save_local(self.persist_dir)
+            self._save_store()
             
             # Clear cache as store has been updated
             self.cache.cache.clear()
@@ -115,15 +352,15 @@ class VectorStore:
             raise Exception(f"Error adding documents: {str(e)}")
 
     def similarity_search(
-        self, 
-        query: str, 
-        k: int = 4, 
+        self,
+        query: str,
+        k: int = Config.SEARCH_K,
         filter: Optional[Dict[str, Any]] = None
     ) -> List[Document]:
         """Search for similar documents."""
         try:
-            return self.vector_store.similarity_search(
-                query, 
+            return self.vector_store.similarity_search_by_vector(
+                self._embed_query_cached(query),
                 k=k,
                 filter=filter
             )
@@ -131,16 +368,79 @@ class VectorStore:
             print(f"Search error: {e}")
             return []
 
+    def _embed_query_cached(self, query: str) -> List[float]:
+        """Embed a query, reusing the cached vector for repeated questions."""
+        key = "qemb:" + hashlib.blake2b(query.encode(), digest_size=16).hexdigest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return np.frombuffer(cached, dtype=np.float32).tolist()
+
+        vector = l2norm(np.asarray(
+            [self.embeddings.embed_query(query)],
+            dtype=np.float32
+        ))[0]
+        self.cache.set(key, vector.tobytes(), ttl=86400)
+        return vector.tolist()
+
+    def batch_similarity_search(
+        self,
+        queries: List[str],
+        k: int = Config.SEARCH_K
+    ) -> List[List[Document]]:
+        """Search for similar documents for several queries in one FAISS call."""
+        try:
+            # Prefix with the BGE query instruction so embed_documents yields
+            # the same vectors embed_query would, but in a single batch
+            vectors = l2norm(np.asarray(
+                self.embeddings.embed_documents(
+                    [BGE_QUERY_INSTRUCTION + q for q in queries]
+                ),
+                dtype=np.float32
+            ))
+            _, indices = self.vector_store.index.search(vectors, k)
+
+            results = []
+            for row in indices:
+                docs = []
+                for idx in row:
+                    if idx == -1:
+                        continue
+                    doc_id = self.vector_store.index_to_docstore_id.get(int(idx))
+                    if doc_id is not None:
+                        docs.append(self.vector_store.docstore.search(doc_id))
+                results.append(docs)
+            return results
+        except Exception as e:
+            print(f"Batch search error: {e}")
+            return [[] for _ in queries]
+
     def delete_document(self, document_id: str) -> None:
         """Delete a document from the vector store."""
         try:
             # Create backup before deletion
             self.create_backup()
             
-            # Delete document
-            self.vector_store.delete(document_id)
-            
-            # Save changes
+            # Delete document. IndexHNSWFlat has no remove_ids, so the HNSW
+            # path rebuilds the graph without the deleted entry instead.
+            # GPU indexes lack remove_ids too: delete on a CPU copy, then
+            # move back
+            if hasattr(self.vector_store.index, "hnsw"):
+                self._rebuild_without([document_id])
+            elif self._on_gpu:
+                self.vector_store.index = faiss.index_gpu_to_cpu(
+                    self.vector_store.index
+                )
+                self._on_gpu = False
+                try:
+                    self.vector_store.delete([document_id])
+                finally:
+                    self._maybe_move_to_gpu()
+            else:
+                self.vector_store.delete([document_id])
+
+            # Deletions invalidate the shard history; compact to a fresh
+            # base pickle before saving
+            self._write_base_pickle()
             self._save_store()
             
             # Clear cache as store has been updated
@@ -149,6 +449,33 @@ class VectorStore:
         except Exception as e:
             raise Exception(f"Error deleting document: {str(e)}")
 
+    def _rebuild_without(self, document_ids: List[str]) -> None:
+        """Rebuild the HNSW index and mappings without the given docstore ids."""
+        removed = set(document_ids)
+        old_index = self.vector_store.index
+        keep = [
+            (pos, doc_id)
+            for pos, doc_id in sorted(self.vector_store.index_to_docstore_id.items())
+            if doc_id not in removed
+        ]
+
+        new_index = faiss.IndexHNSWFlat(old_index.d, Config.HNSW_M)
+        new_index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+        new_index.hnsw.efSearch = Config.HNSW_EF_SEARCH
+        if keep:
+            new_index.add(np.vstack([
+                old_index.reconstruct(pos) for pos, _ in keep
+            ]))
+
+        self.vector_store.index = new_index
+        self.vector_store.index_to_docstore_id = {
+            new_pos: doc_id for new_pos, (_, doc_id) in enumerate(keep)
+        }
+        docs = getattr(self.vector_store.docstore, "_dict", {})
+        for doc_id in removed:
+            docs.pop(doc_id, None)
+        self._mmap_loaded = False  # The rebuilt index lives in RAM
+
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store."""
         try:
@@ -10,13 +10,32 @@ class KenyanWebSearch:
         domain = urlparse(url).netloc.lower()
         return any(domain.endswith(tld) for tld in Config.KENYA_DOMAINS)
 
-    def search(self, query, max_results=5):
+    def search(self, query, max_results=Config.MAX_SEARCH_RESULTS):
+        # Scope each query to a Kenyan TLD with the site: operator so
+        # filtering happens server-side instead of fetching 20 results and
+        # discarding most of them
         results = []
-        for r in self.ddgs.text(query, max_results=20):
-            if self.is_kenyan_domain(r['link']) and len(results) < max_results:
+        seen_links = set()
+        for tld in Config.KENYA_DOMAINS:
+            if len(results) >= max_results:
+                break
+            try:
+                hits = self.ddgs.text(
+                    f"{query} site:{tld.lstrip('.')}",
+                    max_results=max_results
+                )
+            except Exception as e:
+                print(f"Search error for {tld}: {e}")
+                continue
+            for r in hits:
+                if r['link'] in seen_links or not self.is_kenyan_domain(r['link']):
+                    continue
+                seen_links.add(r['link'])
                 results.append({
                     'title': r['title'],
                     'link': r['link'],
                     'snippet': r['body']
                 })
+                if len(results) >= max_results:
+                    break
         return results 
\ No newline at end of file